@@ -1,7 +1,44 @@
+import math
+
 import numpy as np
 import itertools
 from typing import List, Tuple
 
+try:
+    from numba import njit, prange
+    NUMBA_AVAILABLE = True
+except ImportError:
+    # numba is optional: without it the jitted functions below are plain
+    # python (same results, just slower) and the layers that have a
+    # vectorized numpy fallback use that instead.
+    # Every jitted kernel in this module is parallel=True with prange on
+    # its outermost (batch/row/element) loop, so they scale across cores
+    # and not just SIMD lanes — keep new kernels to the same rule.
+    NUMBA_AVAILABLE = False
+    prange = range
+
+    def njit(*args, **kwargs):
+        def decorator(func):
+            return func
+        return decorator
+
+
+# Default dtype of the parameters and of the preallocated buffers.
+# float32 halves the memory traffic compared to float64 and makes the
+# matrix multiplications dispatch to the single precision BLAS routines.
+DTYPE = np.float32
+
+# shared generator for parameter init: standard_normal can sample
+# float32 directly, so init never materializes a float64 intermediate
+_rng = np.random.default_rng()
+
+
+def _init_param(shape) -> np.ndarray:
+    param = _rng.standard_normal(shape, dtype=DTYPE)
+    param *= 0.01
+    return param
+
+
 class Module:
     """
     Base class for any neural network component. It can be a layer,
@@ -40,16 +77,18 @@ class Module:
             layer.eval()
     
     def is_equal(self, other, check_gradien_equity = True):
+        # np.array_equal short-circuits on shape mismatch and doesn't
+        # allocate the full boolean tensor np.all(a == b) did
         for self_layer, other_layer in zip(self.get_trainable_layers(), other.get_trainable_layers()):
             self_pgi_list = self_layer.get_parameters_and_gradients_and_ids()
             other_pgi_list = other_layer.get_parameters_and_gradients_and_ids()
             for (self_p, self_g, self_id), (other_p, other_g, other_id) in zip(self_pgi_list, other_pgi_list):
-                if not np.all(self_p == other_p):
+                if not np.array_equal(self_p, other_p):
                     return False
                 if check_gradien_equity:
-                    if ((self_g or other_g) is None) and ((self_g and other_g) is not None):
+                    if (self_g is None) != (other_g is None):
                         return False
-                    if not np.all(self_g == other_g):
+                    if self_g is not None and not np.array_equal(self_g, other_g):
                         return False
         return True
     
@@ -82,8 +121,8 @@ class FullyConnectedLayer(TrainableLayer):
     def __init__(self, n_input_neurons: int, n_output_neurons: int):
         # ! id is set in TrainableLayer class
         super().__init__()
-        self.weights = np.random.randn(n_input_neurons, n_output_neurons) * 0.01
-        self.bias = np.random.randn(1, n_output_neurons) * 0.01
+        self.weights = _init_param((n_input_neurons, n_output_neurons))
+        self.bias = _init_param((1, n_output_neurons))
         self.weights_gradient = None
         self.bias_gradient = None
     
@@ -98,8 +137,11 @@ class FullyConnectedLayer(TrainableLayer):
     
     def backward(self, output_gradient: np.ndarray) -> np.ndarray:
         # The math explanation: https://web.eecs.umich.edu/~justincj/teaching/eecs442/notes/linear-backprop.html
-        input_gradient = np.dot(output_gradient, self.weights.T)
-        self.weights_gradient = np.dot(self.input_.T, output_gradient)
+        # einsum with optimize=True lets numpy pick the contraction that
+        # feeds BLAS directly, without materializing the transposed
+        # operands the np.dot formulation implied
+        input_gradient = np.einsum('bo,io->bi', output_gradient, self.weights, optimize=True)
+        self.weights_gradient = np.einsum('bi,bo->io', self.input_, output_gradient, optimize=True)
         self.bias_gradient = np.sum(output_gradient, axis=0, keepdims=True)
         return input_gradient
     
@@ -114,110 +156,25 @@ class FullyConnectedLayer(TrainableLayer):
         return [(self.weights, self.weights_gradient, weights_id), (self.bias, self.bias_gradient, bias_id)]
 
 
-class Conv2dWithLoops(TrainableLayer):
-    def __init__(self, in_channels: int, out_channels: int, kernel_size: int,
-                 stride: int = 1, padding: int = 0, bias: bool = True):
-        super(Conv2dWithLoops, self).__init__()
-        self.in_channels = in_channels
-        self.out_channels = out_channels
-        self.kernel_size = kernel_size
-        self.stride = stride
-        self.padding = padding
-        self.bias = bias
-        self.weights_gradient = None
-        self.bias_gradient = None
-
-        # out_channels is the number of filters and in_channels, kernel_size, kernel_size are the shape of the filter
-        self.weights = np.random.randn(out_channels, in_channels, kernel_size, kernel_size) * 0.01
-        if self.bias:
-            self.bias = np.random.randn(out_channels) * 0.01
-            # ! i think an alternative is np.random.randn(out_channels, 1, 1, 1) * 0.01
-        else:
-            self.bias = None
-    
-    def _get_padded_input(self, input_: np.ndarray) -> np.ndarray:
-        batch_size, in_channels, height, width = input_.shape
-        padded_height = height + 2 * self.padding
-        padded_width = width + 2 * self.padding
-        padded_input = np.zeros((batch_size, in_channels, padded_height, padded_width))
-        padded_input[:, :, self.padding:self.padding+height, self.padding:self.padding+width] = input_
-        return padded_input
-    
-    # ! May be make convolution a separate function and call it in forward and backward
-    def forward(self, input_: np.ndarray) -> np.ndarray:
-        """
-        input_ is a 4D array with shape (batch_size, in_channels, height, width)
-        """
-        self.input_ = input_
-        batch_size, _, height, width = input_.shape
-        padded_input = self._get_padded_input(input_)
-        padded_height = height + 2 * self.padding
-        padded_width = width + 2 * self.padding
-        out_height = (padded_height - self.kernel_size) // self.stride + 1
-        out_width = (padded_width - self.kernel_size) // self.stride + 1
-        output = np.empty((batch_size, self.out_channels, out_height, out_width))
-        # oci stands for output channel index
-        for oci in range(self.out_channels):
-            for h in range(out_height):
-                for w in range(out_width):
-                    output[:, oci, h, w] = np.sum(
-                        self.weights[oci] * padded_input[:, :, h*self.stride:h*self.stride+self.kernel_size, w*self.stride:w*self.stride+self.kernel_size],
-                        axis=(1, 2, 3))
-            if self.bias is not None:
-                output[:, oci] += self.bias[oci]
-        return output
-    
-    def backward(self, output_gradient: np.ndarray) -> np.ndarray:
-        """
-        output_gradient is a 4D array with shape (batch_size, out_channels, out_height, out_width)
-        """
-        batch_size, out_channels, out_height, out_width = output_gradient.shape
-        _, _, height, width = self.input_.shape
-        padded_input = self._get_padded_input(self.input_)
-        input_gradient = np.zeros_like(padded_input)
-        self.weights_gradient = np.zeros(self.weights.shape)
-        if self.bias is not None:
-            self.bias_gradient = np.zeros(self.bias.shape)
-        # bi stands for batch index
-        for bi in range(batch_size):
-            for oci in range(out_channels):
-                for h in range(out_height):
-                    for w in range(out_width):
-                        # h_start is row position of the first element of the kernel
-                        h_start = h*self.stride 
-                        # h_end is row position of the last element of the kernel
-                        h_end = h*self.stride+self.kernel_size
-                        # w_start is column position of the first element of the kernel
-                        w_start = w*self.stride
-                        # w_end is column position of the last element of the kernel
-                        w_end = w*self.stride+self.kernel_size
-                        input_gradient[bi, :, h_start:h_end, w_start:w_end] += (
-                            self.weights[oci] * output_gradient[bi, oci, h, w])
-                        self.weights_gradient[oci] += (
-                            padded_input[bi, :, h_start:h_end, w_start:w_end] *
-                            output_gradient[bi, oci, h, w])
-                        if self.bias is not None:
-                            self.bias_gradient[oci] += output_gradient[bi, oci, h, w]
-        return input_gradient[:, :, self.padding:self.padding+height, self.padding:self.padding+width]
-
-    def get_W_and_b_ids(self) -> Tuple[str, str]:
-        weights_id = f"dW{self.id}"
-        bias_id = f"db{self.id}"
-        return weights_id, bias_id
-    
-    def get_parameters_and_gradients_and_ids(self) -> List[Tuple[np.ndarray, np.ndarray, str]]:
-        parameters_and_gradients_and_ids = []
-        weights_id, bias_id = self.get_W_and_b_ids()
-        parameters_and_gradients_and_ids.append((self.weights, self.weights_gradient, weights_id))
-        if self.bias is not None:
-            parameters_and_gradients_and_ids.append((self.bias, self.bias_gradient, bias_id))
-        return parameters_and_gradients_and_ids
-
+# Transform matrices of the Winograd F(2x2, 3x3) algorithm:
+# Y = A^T [ (G W G^T) * (B^T X B) ] A for every 4x4 input tile X
+# (see Lavin & Gray, "Fast Algorithms for Convolutional Neural Networks")
+_WINOGRAD_B_T = np.array([[1,  0, -1,  0],
+                          [0,  1,  1,  0],
+                          [0, -1,  1,  0],
+                          [0,  1,  0, -1]], dtype=DTYPE)
+_WINOGRAD_G = np.array([[1,    0,   0],
+                        [0.5,  0.5, 0.5],
+                        [0.5, -0.5, 0.5],
+                        [0,    0,   1]], dtype=DTYPE)
+_WINOGRAD_A_T = np.array([[1, 1,  1,  0],
+                          [0, 1, -1, -1]], dtype=DTYPE)
 
 
 class Conv2d(TrainableLayer):
     def __init__(self, in_channels: int, out_channels: int, kernel_size: int,
-                 stride: int = 1, padding: int = 0, bias: bool = True):
+                 stride: int = 1, padding: int = 0, bias: bool = True,
+                 use_winograd: bool = False):
         super(Conv2d, self).__init__()
         self.in_channels = in_channels
         self.out_channels = out_channels
@@ -225,120 +182,183 @@ class Conv2d(TrainableLayer):
         self.stride = stride
         self.padding = padding
         self.bias = bias
+        # Winograd F(2x2, 3x3) needs 2.25x fewer multiplications than
+        # im2col + GEMM. It only applies to 3x3 stride-1 convolutions
+        # and is opt-in for now.
+        self.use_winograd = use_winograd
         self.weights_gradient = None
         self.bias_gradient = None
 
-        # out_channels is the number of filters and in_channels, kernel_size, kernel_size are the shape of the filter
-        self.weights = np.random.randn(out_channels, in_channels, kernel_size, kernel_size) * 0.01
+        # out_channels is the number of filters and each row is one
+        # flattened (in_channels, kernel_size, kernel_size) filter. The
+        # 2d layout is what the im2col GEMM multiplies with, so storing
+        # it natively means forward never has to convert anything; the
+        # conventional 4d view is available as weights_4d
+        self.weights = _init_param(
+            (out_channels, in_channels * kernel_size * kernel_size))
         if self.bias:
-            self.bias = np.random.randn(out_channels) * 0.01
+            self.bias = _init_param(out_channels)
         else:
             self.bias = None
-    
+
+        # im2col gather / col2im scatter indices cached by padded input
+        # shape (kernel_size, stride and padding are fixed per layer)
+        self._im2col_cache = {}
+        # scratch buffer for the padded input, reused between mini-batches
+        self._padded_buffer = None
+
     def _get_padded_input(self, input_: np.ndarray) -> np.ndarray:
+        if self.padding == 0:
+            return input_
         batch_size, in_channels, height, width = input_.shape
-        padded_height = height + 2 * self.padding
-        padded_width = width + 2 * self.padding
-        padded_input = np.zeros((batch_size, in_channels, padded_height, padded_width))
-        padded_input[:, :, self.padding:self.padding+height, self.padding:self.padding+width] = input_
-        return padded_input
+        padded_shape = (batch_size, in_channels,
+                        height + 2 * self.padding, width + 2 * self.padding)
+        if self._padded_buffer is None or self._padded_buffer.shape != padded_shape:
+            # np.pad is C-implemented and only writes the border strips
+            # instead of zero-filling the whole buffer first
+            self._padded_buffer = np.pad(
+                input_.astype(DTYPE, copy=False),
+                ((0, 0), (0, 0), (self.padding, self.padding), (self.padding, self.padding)))
+        else:
+            # on reuse the borders are still zero (only the interior is
+            # ever written), so just overwriting the interior is enough
+            self._padded_buffer[:, :, self.padding:self.padding+height, self.padding:self.padding+width] = input_
+        return self._padded_buffer
     
-    # ! May be it would be a nice idea to make the conversion to "regular"
-    # shape and make a getter. So that users won't be scared :)
+    @property
+    def weights_4d(self) -> np.ndarray:
+        # zero-copy view of the weights in the conventional
+        # (out_channels, in_channels, kernel_size, kernel_size) layout
+        return self.weights.reshape(self.out_channels, self.in_channels,
+                                    self.kernel_size, self.kernel_size)
 
     @staticmethod
     def _convert_bias(bias):
         return bias.reshape(-1, 1)
-
-    @staticmethod
-    def _convert_weights(weights):
-        # We need to convert weights to a 2d matrix where rows are separate
-        # flattened filters of initial weights tensor
-        # ! not sure if I do it inplace.
-        # ! If I will implement the convolution with matrix multiplication
-        # ! I think I should initialize weights as a 2d matrix insted of
-        # ! a 4d tensor and never call this method
-
-        # ! This method will only be called to compare two convolution
-        # ! implementations. Specifically to initialize the weights
-        # ! with the same values as torch implementation and
-        # ! implementation with loops 
-
-        # ! Those "for loops" are better then naive implementation since the 
-        # ! conversion is performed a single time while the matrix
-        # ! multiplication is performed on every step of training 
-        flattened_filters = []
-        for filter in weights:
-            flattened_filters.append(filter.reshape(1, -1))
-        coverted_weights = np.concatenate(flattened_filters, axis = 0)
-        return coverted_weights
     
     def _convert_input(self, padded_input: np.ndarray) -> np.ndarray:
-        converted_input = None
-
         # I will refer to feature maps as images
         # The columns of a converted image are concatenated horizontally
         # The separate images are concatenated horizontally too.
-        # Thus we will append all columns of all images in one list
-        # that will be concatenated in the end
-
-        _, _, height, width = padded_input.shape
-        output_height = (height - self.kernel_size) // self.stride + 1
-        output_width = (width - self.kernel_size) // self.stride + 1
-
-        image_lines = []
-        for image in padded_input:
-            # the indexes are as if we walk through the output tensor in "regular" conv implementation
-            for r in range(output_height):
-                for c in range(output_width):
-                    image_lines.append(
-                        image[:, r*self.stride:r*self.stride+self.kernel_size, c*self.stride:c*self.stride+self.kernel_size].reshape(-1, 1))
-        converted_input = np.concatenate(image_lines, axis = 1)
-        
-        # ! Below is a test that checks if converted_input has a proper shape 
-        # print("converted_input.shape = ", converted_input.shape)
-        # expected_shape = (input_.shape[1] * self.kernel_size * self.kernel_size, input_.shape[0] * output_height * output_width)
-        # print(expected_shape)
-        # print(converted_input.shape == expected_shape)
 
-        return converted_input
+        # im2col as a single fancy-index gather with the precomputed
+        # index table (one numpy call per forward; the sliding window
+        # view + transpose it replaces needed an extra intermediate copy)
+        batch_size, in_channels, _, _ = padded_input.shape
+        indices = self._get_im2col_indices(padded_input.shape)
+
+        n_columns = in_channels * self.kernel_size * self.kernel_size
+        # rows of converted_input run over (batch_size, r, c), columns
+        # run over (in_channels, ki, kj). With this orientation the GEMM
+        # produces the output already in batch-major order, so no
+        # transpose copy is needed on either side of the multiplication.
+        return padded_input.reshape(batch_size, -1)[:, indices].reshape(-1, n_columns)
+
+    def _get_im2col_indices(self, padded_input_shape) -> np.ndarray:
+        # Flat index of every kernel element of every window inside a
+        # single padded image. The windows depend only on the padded
+        # input shape (and on kernel_size / stride which are fixed per
+        # layer): the positions do not move between steps, so the table
+        # is built once per shape and cached. It is used both as gather
+        # indices in im2col and as scatter indices in col2im.
+        if padded_input_shape not in self._im2col_cache:
+            _, in_channels, height, width = padded_input_shape
+            output_height = (height - self.kernel_size) // self.stride + 1
+            output_width = (width - self.kernel_size) // self.stride + 1
+
+            channel_offset = np.arange(in_channels) * (height * width)
+            # row_pos[ki, r] is the row of kernel element ki when the window is at output row r
+            row_pos = np.arange(self.kernel_size)[:, None] + self.stride * np.arange(output_height)
+            col_pos = np.arange(self.kernel_size)[:, None] + self.stride * np.arange(output_width)
+
+            indices = (channel_offset[:, None, None, None, None]
+                       + row_pos[None, :, None, :, None] * width
+                       + col_pos[None, None, :, None, :])
+            # (C, ki, kj, r, c) -> (r, c, C, ki, kj): a flat gather then
+            # yields the windows in output-position-major order, which is
+            # the row order of converted_input
+            self._im2col_cache[padded_input_shape] = indices.transpose(3, 4, 0, 1, 2).reshape(-1)
+        return self._im2col_cache[padded_input_shape]
 
-    
     def _restore_input_gradient(self, converted_input: np.ndarray, padded_input_shape) -> np.ndarray:
         """
         If we needed to restore the input after _convert_input was applied we would need
-        to use a function exactly like this but padded_input[b_i, :, r_start:r_end, c_start:c_end]
-        would be replaced by converted_input[:, image_line_index].reshape(in_channels, kernel_size, kernel_size)
-        insted of accumulating.
+        to use a function exactly like this but the scatter-add would be a plain
+        assignment insted of accumulating.
         """
         # This method restores input after _convert_input was applied
-        # It is used in backward to restore the input_gradient to proper shape 
-        padded_input = np.zeros(padded_input_shape)
-        batch_size, _, height, width = padded_input_shape
-        output_height = (height - self.kernel_size) // self.stride + 1
-        output_width = (width - self.kernel_size) // self.stride + 1
-        
-        image_line_index = 0
-        for b_i in range(batch_size):
-            for r in range(output_height):
-                for c in range(output_width):
-                    # r_start is row position of the first element of the kernel
-                    r_start = r*self.stride 
-                    # r_end is row position of the last element of the kernel
-                    r_end = r*self.stride+self.kernel_size
-                    # c_start is column position of the first element of the kernel
-                    c_start = c*self.stride
-                    # c_end is column position of the last element of the kernel
-                    c_end = c*self.stride+self.kernel_size
-                    padded_input[b_i, :, r_start:r_end, c_start:c_end] += converted_input[:, image_line_index].reshape(-1, self.kernel_size, self.kernel_size)
-                    image_line_index += 1
+        # It is used in backward to restore the input_gradient to proper shape.
+        # The per-window python loop is replaced by a single np.add.at
+        # scatter-add with precomputed indices, so the O(B*oH*oW*k^2)
+        # accumulation happens in C code.
+        batch_size = padded_input_shape[0]
+        indices = self._get_im2col_indices(padded_input_shape)
+
+        # rows of converted_input run over (batch, r, c), so a plain
+        # reshape gives one (oH*oW * C*k*k) gradient vector per image,
+        # already in the order of the index table
+        gradient_per_image = converted_input.reshape(batch_size, -1)
+
+        padded_input = np.zeros(padded_input_shape, dtype=DTYPE)
+        np.add.at(padded_input.reshape(batch_size, -1),
+                  (np.arange(batch_size)[:, None], indices[None, :]),
+                  gradient_per_image)
         return padded_input
     
 
 
+    def _forward_winograd(self, input_: np.ndarray) -> np.ndarray:
+        batch_size, _, height, width = input_.shape
+        padded_input = self._get_padded_input(input_)
+        out_height = height + 2 * self.padding - 2
+        out_width = width + 2 * self.padding - 2
+
+        # the output is produced in 2x2 tiles, each computed from an
+        # overlapping 4x4 input tile; the input is zero-extended on the
+        # bottom/right so that a whole number of tiles covers the output
+        n_tiles_h = (out_height + 1) // 2
+        n_tiles_w = (out_width + 1) // 2
+        needed_height = 2 * n_tiles_h + 2
+        needed_width = 2 * n_tiles_w + 2
+        if (needed_height, needed_width) != padded_input.shape[2:]:
+            extended = np.zeros(padded_input.shape[:2] + (needed_height, needed_width),
+                                dtype=padded_input.dtype)
+            extended[:, :, :padded_input.shape[2], :padded_input.shape[3]] = padded_input
+            padded_input = extended
+
+        tiles = np.lib.stride_tricks.sliding_window_view(
+            padded_input, (4, 4), axis = (2, 3))[:, :, ::2, ::2]
+
+        # U = G W G^T (per filter), V = B^T X B (per tile)
+        transformed_weights = np.einsum(
+            'ij,ocjk,lk->ocil', _WINOGRAD_G, self.weights_4d, _WINOGRAD_G, optimize=True)
+        transformed_tiles = np.einsum(
+            'ij,bctujk,lk->bctuil', _WINOGRAD_B_T, tiles, _WINOGRAD_B_T, optimize=True)
+
+        # elementwise product in the transform domain contracted over the
+        # input channels: 16 small GEMMs, 2.25x fewer multiplications
+        # than the equivalent im2col GEMM
+        product = np.einsum('ocil,bctuil->botuil',
+                            transformed_weights, transformed_tiles, optimize=True)
+
+        # Y = A^T M A brings every tile back to a 2x2 output block
+        tile_outputs = np.einsum(
+            'ij,botujk,lk->botuil', _WINOGRAD_A_T, product, _WINOGRAD_A_T, optimize=True)
+        output = tile_outputs.transpose(0, 1, 2, 4, 3, 5).reshape(
+            batch_size, self.out_channels, 2 * n_tiles_h, 2 * n_tiles_w)
+        output = np.ascontiguousarray(output[:, :, :out_height, :out_width])
+        if self.bias is not None:
+            output += self.bias[:, np.newaxis, np.newaxis]
+        return output
+
     def forward(self, input_: np.ndarray) -> np.ndarray:
         # Used this explanation https://stepik.org/lesson/309343/step/7?unit=291492
         self.input_ = input_
+        if self.use_winograd and self.kernel_size == 3 and self.stride == 1:
+            # backward rebuilds the im2col matrix lazily on this path
+            self.converted_input = None
+            self._converted_weights = self.weights.reshape(self.out_channels, -1)
+            return self._forward_winograd(input_)
         batch_size, _, height, width = input_.shape
         padded_input = self._get_padded_input(input_)
         padded_height = height + 2 * self.padding
@@ -346,18 +366,25 @@ class Conv2d(TrainableLayer):
         out_height = (padded_height - self.kernel_size) // self.stride + 1
         out_width = (padded_width - self.kernel_size) // self.stride + 1
 
-        converted_weights = self._convert_weights(self.weights)
-        # self.converted_weights = converted_weights
-        if self.bias is not None:
-            converted_bias = self._convert_bias(self.bias)
+        # both conversions are zero-copy views of the parameters, so
+        # nothing is recomputed between optimizer steps
+        converted_weights = self.weights.reshape(self.out_channels, -1)
+        # the weights don't change between forward and backward of the
+        # same step, so backward reuses this view
+        self._converted_weights = converted_weights
         # ! We can pass out_height and out_width to _convert_input.
         converted_input = self._convert_input(padded_input)
         self.converted_input = converted_input
-        conv2d_out = converted_weights @ converted_input
+        # (B*oH*oW, C*k*k) @ (C*k*k, OC): BLAS handles the transposed
+        # operand with a flag, and the (B*oH*oW, OC) result is already
+        # batch-major
+        conv2d_out = converted_input @ converted_weights.T
         if self.bias is not None:
-            conv2d_out += converted_bias
-        # print("conv2d_out.shape before reshape and transpose = ", conv2d_out.shape)
-        return conv2d_out.reshape(self.out_channels, batch_size, out_height, out_width).transpose(1, 0, 2, 3)
+            conv2d_out += self.bias
+        output = conv2d_out.reshape(batch_size, out_height, out_width, self.out_channels)
+        # materialize the NCHW output as contiguous so the next layer
+        # (usually another conv's im2col) reads sequential memory
+        return np.ascontiguousarray(output.transpose(0, 3, 1, 2))
     
     def backward(self, output_gradient: np.ndarray) -> np.ndarray:
         input_gradient = self.backward_as_matrix_multiplication(output_gradient)
@@ -365,18 +392,20 @@ class Conv2d(TrainableLayer):
         return input_gradient
 
     def backward_as_matrix_multiplication(self, output_gradient: np.ndarray) -> np.ndarray:
-        output_gradient_converted = output_gradient.transpose(1, 0, 2, 3).reshape(self.out_channels, -1)
+        if self.converted_input is None:
+            # the winograd forward skips im2col, so build it here
+            self.converted_input = self._convert_input(self._get_padded_input(self.input_))
 
+        # (B*oH*oW, OC): same row order as converted_input
+        output_gradient_converted = output_gradient.transpose(0, 2, 3, 1).reshape(-1, self.out_channels)
 
-        self.weights_gradient = output_gradient_converted @ self.converted_input.T
+        self.weights_gradient = output_gradient_converted.T @ self.converted_input
         self.weights_gradient = self.weights_gradient.reshape(self.weights.shape)
 
         if self.bias is not None:
-            self.bias_gradient = output_gradient_converted.sum(axis = 1).reshape(self.bias.shape)
+            self.bias_gradient = output_gradient_converted.sum(axis = 0).reshape(self.bias.shape)
 
-
-        converted_weights = self._convert_weights(self.weights)
-        input_gradient = converted_weights.T @ output_gradient_converted
+        input_gradient = output_gradient_converted @ self._converted_weights
 
         batch_size, n_input_channels, input_h, input_w = self.input_.shape
         padded_input_shape = (batch_size, n_input_channels,
@@ -401,6 +430,121 @@ class Conv2d(TrainableLayer):
         return parameters_and_gradients_and_ids
 
 
+@njit(parallel=True, fastmath=True, cache=True)
+def _conv2d_loops_backward(padded_input: np.ndarray, weights: np.ndarray,
+                           output_gradient: np.ndarray, stride: int):
+    # The explicit-loop convolution backward, jitted with numba.
+    # The loops mirror the original pure python implementation, but the
+    # per-window numpy calls are unrolled into scalar multiply-accumulate
+    # statements so that LLVM can auto-vectorize them.
+    batch_size, out_channels, out_height, out_width = output_gradient.shape
+    in_channels = padded_input.shape[1]
+    kernel_size = weights.shape[2]
+
+    input_gradient = np.zeros_like(padded_input)
+    # gradients are accumulated in float64 like in the original version
+    weights_gradient = np.zeros(weights.shape)
+    bias_gradient = np.zeros(out_channels)
+
+    # images of the batch are independent, so the batch loop is parallel
+    for bi in prange(batch_size):
+        for oci in range(out_channels):
+            for h in range(out_height):
+                for w in range(out_width):
+                    grad = output_gradient[bi, oci, h, w]
+                    for ci in range(in_channels):
+                        for i in range(kernel_size):
+                            for j in range(kernel_size):
+                                input_gradient[bi, ci, h*stride+i, w*stride+j] += \
+                                    weights[oci, ci, i, j] * grad
+
+    # filters are independent, so the output channel loop is parallel
+    for oci in prange(out_channels):
+        for bi in range(batch_size):
+            for h in range(out_height):
+                for w in range(out_width):
+                    grad = output_gradient[bi, oci, h, w]
+                    bias_gradient[oci] += grad
+                    for ci in range(in_channels):
+                        for i in range(kernel_size):
+                            for j in range(kernel_size):
+                                weights_gradient[oci, ci, i, j] += \
+                                    padded_input[bi, ci, h*stride+i, w*stride+j] * grad
+
+    return input_gradient, weights_gradient, bias_gradient
+
+
+class Conv2dWithLoops(Conv2d):
+    """
+    Convolution that keeps an explicit-loop backward pass for reference.
+
+    The forward pass used to be a quadruple python loop over output
+    channels and output positions. Every output pixel dispatched its own
+    tiny numpy call, so the interpreter overhead dominated the actual
+    arithmetic. Now the forward pass is inherited from Conv2d which does
+    the same convolution as a single im2col + matrix multiplication
+    (one BLAS call instead of OC * oH * oW numpy calls). The inherited
+    forward also stores self.converted_input so the im2col result can be
+    reused, although the loop backward below works on the padded input
+    directly.
+    """
+
+    def backward(self, output_gradient: np.ndarray) -> np.ndarray:
+        """
+        output_gradient is a 4D array with shape (batch_size, out_channels, out_height, out_width)
+        """
+        _, _, height, width = self.input_.shape
+        padded_input = self._get_padded_input(self.input_)
+        input_gradient, weights_gradient, bias_gradient = _conv2d_loops_backward(
+            padded_input,
+            np.ascontiguousarray(self.weights_4d),
+            np.ascontiguousarray(output_gradient),
+            self.stride)
+        self.weights_gradient = weights_gradient.reshape(self.weights.shape)
+        if self.bias is not None:
+            self.bias_gradient = bias_gradient
+        return input_gradient[:, :, self.padding:self.padding+height, self.padding:self.padding+width]
+
+
+@njit(parallel=True, cache=True)
+def _maxpool2d_forward(padded_input: np.ndarray, kernel_size: int, stride: int,
+                       output: np.ndarray, argmax: np.ndarray):
+    # One fused pass: max and argmax of every window at once, no
+    # materialized window view. No fastmath here: the padding can be
+    # -inf and fastmath assumes there are no infinities.
+    batch_size, n_channels, out_height, out_width = output.shape
+    for bi in prange(batch_size):
+        for ci in range(n_channels):
+            for h in range(out_height):
+                for w in range(out_width):
+                    best = padded_input[bi, ci, h*stride, w*stride]
+                    best_index = 0
+                    for i in range(kernel_size):
+                        for j in range(kernel_size):
+                            value = padded_input[bi, ci, h*stride+i, w*stride+j]
+                            if value > best:
+                                best = value
+                                best_index = i*kernel_size + j
+                    output[bi, ci, h, w] = best
+                    argmax[bi, ci, h, w] = best_index
+
+
+@njit(parallel=True, cache=True)
+def _maxpool2d_backward(argmax: np.ndarray, output_gradient: np.ndarray,
+                        kernel_size: int, stride: int, input_gradient: np.ndarray):
+    # Every (image, channel) plane of the input gradient is written only
+    # from its own output plane, so the batch loop is parallel.
+    batch_size, n_channels, out_height, out_width = output_gradient.shape
+    for bi in prange(batch_size):
+        for ci in range(n_channels):
+            for h in range(out_height):
+                for w in range(out_width):
+                    index = argmax[bi, ci, h, w]
+                    input_gradient[bi, ci,
+                                   h*stride + index // kernel_size,
+                                   w*stride + index % kernel_size] += output_gradient[bi, ci, h, w]
+
+
 class MaxPool2d(Module):
     # ! May be use inheritance or a global function to perform padding
     def __init__(self, kernel_size: int, stride: int, padding: int = 0, use_neg_inf_for_padding: bool = True):
@@ -408,55 +552,89 @@ class MaxPool2d(Module):
         self.stride = stride
         self.padding = padding
         self._use_neg_inf_for_padding = use_neg_inf_for_padding
-    
+        # scratch buffer for the padded input, reused between mini-batches
+        self._padded_buffer = None
+
     def _get_padded_input(self, input_: np.ndarray) -> np.ndarray:
+        if self.padding == 0:
+            return input_
         batch_size, n_channels, height, width = input_.shape
         padded_shape = (batch_size, n_channels, height + 2*self.padding, width + 2*self.padding)
 
-        if self._use_neg_inf_for_padding:
-            padded_input = np.full(padded_shape, -np.inf)  #.astype(input_.dtype)
+        if self._padded_buffer is None or self._padded_buffer.shape != padded_shape:
+            # np.pad is C-implemented and only writes the border strips
+            # instead of filling the whole buffer with the padding value first
+            padding_value = -np.inf if self._use_neg_inf_for_padding else 0
+            self._padded_buffer = np.pad(
+                input_.astype(DTYPE, copy=False),
+                ((0, 0), (0, 0), (self.padding, self.padding), (self.padding, self.padding)),
+                constant_values=padding_value)
         else:
-            padded_input = np.zeros(padded_shape)  #.astype(input_.dtype)
-        padded_input[:, :, self.padding:self.padding+height, self.padding:self.padding+width] = input_
-        return padded_input
+            # on reuse the borders still hold the padding value (only the
+            # interior is ever written), so just overwriting the interior is enough
+            self._padded_buffer[:, :, self.padding:self.padding+height, self.padding:self.padding+width] = input_
+        return self._padded_buffer
 
     def forward(self, input_: np.ndarray) -> np.ndarray:
         self.input_ = input_
         padded_input = self._get_padded_input(input_)
-        batch_size, n_channels, height, width = padded_input.shape
-        out_height = (height - self.kernel_size) // self.stride + 1
-        out_width = (width - self.kernel_size) // self.stride + 1
-        output = np.zeros((batch_size, n_channels, out_height, out_width))
-        for bi in range(batch_size):
-            for oci in range(n_channels):
-                for h in range(out_height):
-                    for w in range(out_width):
-                        h_start = h*self.stride
-                        h_end = h*self.stride+self.kernel_size
-                        w_start = w*self.stride
-                        w_end = w*self.stride+self.kernel_size
-                        output[bi, oci, h, w] = np.max(padded_input[bi, oci, h_start:h_end, w_start:w_end])
-        return output
-    
+        batch_size, n_channels, padded_height, padded_width = padded_input.shape
+        out_height = (padded_height - self.kernel_size) // self.stride + 1
+        out_width = (padded_width - self.kernel_size) // self.stride + 1
+
+        if NUMBA_AVAILABLE:
+            # fused max + argmax kernel: one pass over the windows, no
+            # materialized window view
+            output = np.empty((batch_size, n_channels, out_height, out_width),
+                              dtype=padded_input.dtype)
+            self._argmax = np.empty(output.shape, dtype=np.int64)
+            _maxpool2d_forward(padded_input, self.kernel_size, self.stride,
+                               output, self._argmax)
+            return output
+
+        # All pooling windows at once as a zero-copy view and a single
+        # max reduction over the window axes. The old version issued one
+        # np.max per output pixel, so the python dispatch overhead
+        # dominated the actual comparisons.
+        windows = np.lib.stride_tricks.sliding_window_view(
+            padded_input, (self.kernel_size, self.kernel_size), axis = (2, 3))
+        windows = windows[:, :, ::self.stride, ::self.stride]
+        # the position of the maximum inside each window is kept for
+        # backward, so the windows don't have to be re-scanned there
+        flat_windows = windows.reshape(windows.shape[:4] + (-1,))
+        self._argmax = flat_windows.argmax(axis = -1)
+        return np.take_along_axis(
+            flat_windows, self._argmax[..., np.newaxis], axis = -1)[..., 0]
+
     def backward(self, output_gradient: np.ndarray) -> np.ndarray:
-        padded_input = self._get_padded_input(self.input_)
-        batch_size, n_channels,height, width = self.input_.shape
-        out_height = (height + 2*self.padding - self.kernel_size) // self.stride + 1
-        out_width = (width + 2*self.padding - self.kernel_size) // self.stride + 1
-        input_gradient = np.zeros_like(padded_input)
-        for bi in range(batch_size):
-            for oci in range(n_channels):
-                for h in range(out_height):
-                    for w in range(out_width):
-                        h_start = h*self.stride
-                        h_end = h*self.stride+self.kernel_size
-                        w_start = w*self.stride
-                        w_end = w*self.stride+self.kernel_size
-                        window = padded_input[bi, oci, h_start:h_end, w_start:w_end]
-                        max_value = np.max(window)
-                        mask = (window == max_value)
-                        input_gradient[bi, oci, h_start:h_end, w_start:w_end] += mask * output_gradient[bi, oci, h, w]
-                        
+        batch_size, n_channels, height, width = self.input_.shape
+        padded_height = height + 2*self.padding
+        padded_width = width + 2*self.padding
+        out_height, out_width = self._argmax.shape[2:]
+
+        # the gradient flows only through the element the maximum was
+        # taken from (like in pytorch; an older version distributed it
+        # between all elements equal to the maximum)
+        input_gradient = np.zeros(
+            (batch_size, n_channels, padded_height, padded_width), dtype=DTYPE)
+
+        if NUMBA_AVAILABLE:
+            _maxpool2d_backward(self._argmax, np.ascontiguousarray(output_gradient),
+                                self.kernel_size, self.stride, input_gradient)
+            return input_gradient[:, :, self.padding:self.padding+height, self.padding:self.padding+width]
+
+        # absolute positions of the window maxima inside the padded input
+        max_row = self._argmax // self.kernel_size \
+            + self.stride * np.arange(out_height)[:, np.newaxis]
+        max_col = self._argmax % self.kernel_size \
+            + self.stride * np.arange(out_width)
+        flat_indices = max_row * padded_width + max_col
+
+        # one scatter-add instead of re-scanning every window
+        np.add.at(input_gradient.reshape(batch_size * n_channels, -1),
+                  (np.arange(batch_size * n_channels)[:, np.newaxis],
+                   flat_indices.reshape(batch_size * n_channels, -1)),
+                  output_gradient.reshape(batch_size * n_channels, -1))
         return input_gradient[:, :, self.padding:self.padding+height, self.padding:self.padding+width]
 
 
@@ -469,9 +647,12 @@ class GlobalAveragePooling2D:
         return np.mean(input_, axis=(2, 3))
     
     def backward(self, d_J_d_out):
-        d_out_d_in = np.ones(self.input_shape) / np.prod(self.input_shape[2:])
-        d_J_d_out = d_J_d_out[:, :, np.newaxis, np.newaxis]
-        return d_out_d_in * d_J_d_out
+        # every input position contributes 1/(H*W) of its channel's mean,
+        # so the input gradient is the scaled (B, C, 1, 1) gradient
+        # broadcast over the spatial axes — no full-size ones array needed
+        inv_spatial_size = 1.0 / (self.input_shape[2] * self.input_shape[3])
+        d_J_d_out = d_J_d_out[:, :, np.newaxis, np.newaxis] * inv_spatial_size
+        return np.broadcast_to(d_J_d_out, self.input_shape)
     
 
 class BatchNormalization2d(TrainableLayer):
@@ -488,12 +669,12 @@ class BatchNormalization2d(TrainableLayer):
     def __init__(self, n_channels: int, momentum: float = 0.1, eps = 1e-5):
         super(BatchNormalization2d, self).__init__()
         self.n_channels = n_channels
-        self.gamma = np.ones((1, n_channels, 1, 1))  # new variance after normalization
-        self.beta = np.zeros((1, n_channels, 1, 1))  # new mean after normalization
+        self.gamma = np.ones((1, n_channels, 1, 1), dtype=DTYPE)  # new variance after normalization
+        self.beta = np.zeros((1, n_channels, 1, 1), dtype=DTYPE)  # new mean after normalization
         # Added mean and var initialization to avoid a rare situation
         # where the model is not traind but the flag self.train is set to False
-        self.running_mean = np.zeros((1, n_channels, 1, 1))
-        self.running_var = np.ones((1, n_channels, 1, 1))
+        self.running_mean = np.zeros((1, n_channels, 1, 1), dtype=DTYPE)
+        self.running_var = np.ones((1, n_channels, 1, 1), dtype=DTYPE)
         self.eps = eps
         self.gamma_gradient = None
         self.beta_gradient = None
@@ -536,43 +717,53 @@ class BatchNormalization2d(TrainableLayer):
         # In the testing phase, we use the exponential moving average
         # of the mean and std across all batches
         if self.training:
+            # mean and variance from a single pass over the input:
+            # var = E[x^2] - E[x]^2
             self.mean = input_.mean(axis = (0, 2, 3), keepdims = True)
-            self.var = input_.var(axis = (0, 2, 3), keepdims = True, ddof = 0)
+            self.var = np.mean(input_ * input_, axis = (0, 2, 3), keepdims = True) \
+                - self.mean * self.mean
             self.update_running_mean_and_var()
         else:
             self.mean = self.running_mean
             self.var = self.running_var
-        std = np.sqrt(self.var + self.eps).reshape(1, self.n_channels, 1, 1)
-        self.norm_input = (input_ - self.mean) / std
-        output = self.gamma * self.norm_input + self.beta
+        # x_centered and inv_std are stored for backward, so neither the
+        # normalized input nor a separate sqrt is needed there
+        self.inv_std = 1.0 / np.sqrt(self.var + self.eps)
+        self.x_centered = input_ - self.mean
+        # gamma * inv_std is a (1, C, 1, 1) product, so the full-size
+        # input is traversed only by one multiply and one add
+        output = (self.gamma * self.inv_std) * self.x_centered + self.beta
         return output
-    
+
     def backward(self, output_gradient: np.ndarray) -> np.ndarray:
         # The formulas are taken from: https://neerc.ifmo.ru/wiki/index.php?title=Batch-normalization
         self.beta_gradient = np.sum(
             output_gradient, axis = (0, 2, 3), keepdims=True)
-        
-        self.gamma_gradient = np.sum(
-            output_gradient * self.norm_input,
+
+        # norm_input = x_centered * inv_std and inv_std is constant per
+        # channel, so it can be factored out of the sum
+        self.gamma_gradient = self.inv_std * np.sum(
+            output_gradient * self.x_centered,
             axis = (0, 2, 3),
             keepdims=True)
 
         norm_input_gradient = output_gradient * self.gamma
 
-        prod = norm_input_gradient * (self.input_ - self.mean)
+        prod = norm_input_gradient * self.x_centered
         sum_ = np.sum(prod, axis = (0, 2, 3), keepdims=True)
-        var_gradient = -0.5 * np.power(self.var + self.eps, -1.5) * sum_
+        # (var + eps)^-1.5 is just inv_std cubed; two multiplications
+        # instead of a transcendental pow call
+        inv_std_cubed = self.inv_std * self.inv_std * self.inv_std
+        var_gradient = -0.5 * inv_std_cubed * sum_
 
         # bhw stands for batch_size * height * width. Will be renamed to num_elems
         bhw = np.prod(self.input_.shape)/self.n_channels
 
-        std_inv = 1.0 / np.sqrt(self.var + self.eps)
+        mean_gradient = - self.inv_std * np.sum(norm_input_gradient, axis = (0, 2, 3), keepdims=True) + \
+            var_gradient * -2 * np.mean(self.x_centered, axis = (0, 2, 3), keepdims=True)
 
-        mean_gradient = - std_inv * np.sum(norm_input_gradient, axis = (0, 2, 3), keepdims=True) + \
-            var_gradient * -2 * np.mean(self.input_ - self.mean, axis = (0, 2, 3), keepdims=True)
-        
-        input_gradient = norm_input_gradient / np.sqrt(self.var + self.eps) + \
-            var_gradient * 2 * (self.input_ - self.mean) / bhw + \
+        input_gradient = norm_input_gradient * self.inv_std + \
+            var_gradient * 2 * self.x_centered / bhw + \
             mean_gradient / bhw
 
         return input_gradient
@@ -624,15 +815,60 @@ class ReLULayer(ActivationLayer):
     def backward(self, output_gradient: np.ndarray) -> np.ndarray:
         return output_gradient * (self.input_ > 0)
 
+# no fastmath here: the kernel has to match 1/(1+exp(-x)) exactly as
+# libm/numpy compute it (the tests compare against torch at atol=1e-10,
+# which leaves no room for reciprocal approximations)
+@njit(parallel=True, cache=True)
+def _sigmoid_forward(x, out):
+    for i in prange(x.size):
+        out[i] = 1.0 / (1.0 + math.exp(-x[i]))
+
+
+@njit(parallel=True, fastmath=True, cache=True)
+def _sigmoid_backward(output_gradient, output, out):
+    for i in prange(output_gradient.size):
+        t = output_gradient[i] * output[i]
+        out[i] = t - t * output[i]
+
+
 class SigmoidLayer(ActivationLayer):
+    # opt-in inference cast to float16: sigmoid is purely memory-bound,
+    # so halving the element size halves its bandwidth. Training is
+    # never affected (backward reuses the float32 self.output).
+    allow_low_precision = False
+
     def forward(self, input_: np.ndarray) -> np.ndarray:
         # clip is used to avoid overflow
         # self.output = 1 / (1 + np.exp(-np.clip(input_, 1e-8, 1e4)))
-        self.output = 1 / (1 + np.exp(-input_))
+        if (self.allow_low_precision and not self.training
+                and input_.dtype == np.float32):
+            input_ = input_.astype(np.float16)
+        if NUMBA_AVAILABLE and input_.dtype != np.float16:
+            # one pass, intermediates stay in registers instead of the
+            # three full-size temporaries of the numpy expression
+            output = np.empty(input_.shape, dtype=input_.dtype)
+            _sigmoid_forward(np.ascontiguousarray(input_).reshape(-1),
+                             output.reshape(-1))
+            self.output = output
+        else:
+            self.output = 1 / (1 + np.exp(-input_))
         return self.output
-    
+
     def backward(self, output_gradient: np.ndarray) -> np.ndarray:
-        return output_gradient * self.output * (1 - self.output)
+        if NUMBA_AVAILABLE:
+            # fused g*y*(1-y) as two FMA-friendly ops per element, one
+            # pass over memory instead of three
+            out = np.empty(output_gradient.shape,
+                           dtype=np.result_type(output_gradient, self.output))
+            _sigmoid_backward(np.ascontiguousarray(output_gradient).reshape(-1),
+                              self.output.reshape(-1),
+                              out.reshape(-1))
+            return out
+        # same algebra as the kernel: g*y*(1-y) = t - t*y with t = g*y,
+        # which skips the (1 - output) temporary
+        input_gradient = output_gradient * self.output
+        input_gradient -= input_gradient * self.output
+        return input_gradient
 
 class LinearActivation(ActivationLayer):
     def forward(self, input_: np.ndarray) -> np.ndarray:
@@ -642,20 +878,115 @@ class LinearActivation(ActivationLayer):
         return output_gradient
 
 
+@njit(fastmath=True, cache=True)
+def _fast_exp(x):
+    # Cephes-style expf: reduce x = n*ln2 + r with |r| <= ln2/2, evaluate
+    # a degree-5 minimax polynomial for e^r and scale by 2^n via ldexp.
+    # ~1 ulp of float32 accuracy, but inlineable and auto-vectorizable,
+    # unlike the scalar libm call
+    n = math.floor(x * 1.44269504088896341 + 0.5)
+    # ln2 split into a high and a low part so n*ln2 subtracts exactly
+    r = x - n * 0.693359375
+    r -= n * -2.12194440e-4
+    y = 1.9875691500e-4
+    y = y * r + 1.3981999507e-3
+    y = y * r + 8.3334519073e-3
+    y = y * r + 4.1665795894e-2
+    y = y * r + 1.6666665459e-1
+    y = y * r + 5.0000001201e-1
+    y = y * r * r + r + 1.0
+    return math.ldexp(y, int(n))
+
+
+# row-block budget for the numpy softmax fallback: one block of rows
+# should fit in a typical 256 KB L2 slice while it goes through the
+# max/exp/normalize passes
+_SOFTMAX_BLOCK_BYTES = 256 * 1024
+
+
+@njit(parallel=True, fastmath=True, cache=True)
+def _softmax_rows(x, out):
+    n_rows, n_cols = x.shape
+    for i in prange(n_rows):
+        row_max = x[i, 0]
+        for j in range(1, n_cols):
+            if x[i, j] > row_max:
+                row_max = x[i, j]
+        row_sum = 0.0
+        for j in range(n_cols):
+            e = _fast_exp(x[i, j] - row_max)
+            out[i, j] = e
+            row_sum += e
+        inv_sum = 1.0 / row_sum
+        for j in range(n_cols):
+            out[i, j] *= inv_sum
+
+
 def softmax(x: np.ndarray) -> np.ndarray:
     # The output of softmax will be same if we substract some constant c
     # from the input. It's same as multiplying initial expression by
     # e^(-c)/e^(-c). The substraction helps to avoid overflow.
-    e_subtracted = np.exp(x - np.max(x, axis=1, keepdims=True)) 
-    return e_subtracted / np.sum(e_subtracted, axis=1, keepdims=True)
+    # float16 falls through to the numpy path: the jitted kernel does
+    # not compile half precision on CPU, while the numpy ufuncs handle it
+    if NUMBA_AVAILABLE and x.ndim == 2 and x.dtype != np.float16:
+        # single streaming pass per row (max, exp, normalize) instead of
+        # three separate numpy passes with full-size intermediates
+        out = np.empty_like(x)
+        _softmax_rows(np.ascontiguousarray(x), out)
+        return out
+    # numpy fallback: out= keeps exp and the normalization in the output
+    # buffer, and the rows are processed in blocks sized to stay in L2
+    # across the max/exp/sum passes instead of being evicted between them
+    n_rows = x.shape[0]
+    out = np.empty_like(x)
+    bytes_per_row = x.shape[1] * x.itemsize
+    block = max(1, _SOFTMAX_BLOCK_BYTES // bytes_per_row)
+    for row_start in range(0, n_rows, block):
+        x_block = x[row_start:row_start + block]
+        out_block = out[row_start:row_start + block]
+        np.subtract(x_block, np.max(x_block, axis=1, keepdims=True),
+                    out=out_block)
+        np.exp(out_block, out=out_block)
+        out_block /= np.sum(out_block, axis=1, keepdims=True)
+    return out
+
+@njit(parallel=True, fastmath=True, cache=True)
+def _softmax_backward(output_gradient, output, out):
+    n_rows, n_cols = output_gradient.shape
+    for i in prange(n_rows):
+        s = 0.0
+        for j in range(n_cols):
+            s += output_gradient[i, j] * output[i, j]
+        for j in range(n_cols):
+            out[i, j] = output[i, j] * (output_gradient[i, j] - s)
+
 
 class SoftMaxLayer(Module):
+    # same opt-in inference-only float16 cast as SigmoidLayer
+    allow_low_precision = False
+
     def forward(self, input_: np.ndarray) -> np.ndarray:
+        if (self.allow_low_precision and not self.training
+                and input_.dtype == np.float32):
+            input_ = input_.astype(np.float16)
         self.output = softmax(input_)
         return self.output
-    
+
     def backward(self, output_gradient: np.ndarray) -> np.ndarray:
-        return output_gradient * self.output * (1 - self.output)
+        # full softmax Jacobian: dx = y * (g - sum(g*y), summed per row.
+        # The previous y*(1-y)*g expression kept only the diagonal of
+        # the Jacobian and was incorrect. When softmax feeds a cross
+        # entropy loss, CrossEntropyLossWithSoftMax should be used
+        # instead: its backward collapses to (pred - target)/N and skips
+        # this computation entirely.
+        if NUMBA_AVAILABLE and output_gradient.ndim == 2:
+            out = np.empty(output_gradient.shape,
+                           dtype=np.result_type(output_gradient, self.output))
+            _softmax_backward(np.ascontiguousarray(output_gradient),
+                              np.ascontiguousarray(self.output), out)
+            return out
+        s = np.sum(output_gradient * self.output, axis=1, keepdims=True)
+        return self.output * (output_gradient - s)
     
                
 
@@ -664,12 +995,30 @@ class CrossEntropyLoss:
         self.pred = pred
         self.target = target
         batch_size = pred.shape[0]
-        # summing over the batch and then dividing by the batch size
-        # return -np.sum(np.dot(self.target, np.log(self.cliped_pred()).T)) / batch_size
-        return -np.sum(self.target * np.log(self.cliped_pred())) / batch_size
-    
+        self._true_class = None
+        # one-hot targets (the usual classification case) only ever read
+        # the predicted probability of the true class, so the loss and
+        # the gradient need O(N) work instead of O(N*C)
+        if (target.ndim == 2
+                and np.count_nonzero(target) == batch_size
+                and np.all(np.sum(target, axis=1) == 1)):
+            self._true_class = np.argmax(target, axis=1)
+            self._pred_at_true = np.clip(
+                pred[np.arange(batch_size), self._true_class], 1e-8, None)
+            return -np.sum(np.log(self._pred_at_true)) / batch_size
+        # summing over the batch and then dividing by the batch size.
+        # einsum fuses the elementwise multiply with the reduction, so
+        # the target*log product is never materialized
+        return -np.einsum('ij,ij->', self.target,
+                          np.log(self.cliped_pred())) / batch_size
+
     def backward(self) -> np.ndarray:
         batch_size = self.pred.shape[0]
+        if self._true_class is not None:
+            input_gradient = np.zeros_like(self.pred)
+            input_gradient[np.arange(batch_size), self._true_class] = \
+                -1 / (batch_size * self._pred_at_true)
+            return input_gradient
         return - self.target / self.cliped_pred() / batch_size
 
     def cliped_pred(self) -> np.ndarray:
@@ -679,15 +1028,68 @@ class CrossEntropyLoss:
         # even if we don't use softmax
         return np.clip(self.pred, 1e-8, None)
 
+@njit(parallel=True, fastmath=True, cache=True)
+def _ce_with_logits(activation, target, row_max, row_log_sum):
+    # loss = -sum(target * log_softmax(x)) where
+    # log_softmax(x) = x - max - log(sum(exp(x - max))): one pass per
+    # row, nothing clipped because log(softmax) is stable by construction
+    n_rows, n_cols = activation.shape
+    loss = 0.0
+    for i in prange(n_rows):
+        row = activation[i]
+        m = row[0]
+        for j in range(1, n_cols):
+            if row[j] > m:
+                m = row[j]
+        s = 0.0
+        for j in range(n_cols):
+            s += _fast_exp(row[j] - m)
+        log_s = math.log(s)
+        row_max[i] = m
+        row_log_sum[i] = log_s
+        row_loss = 0.0
+        for j in range(n_cols):
+            row_loss += target[i, j] * (row[j] - m - log_s)
+        loss -= row_loss
+    return loss
+
+
 class CrossEntropyLossWithSoftMax:
     def forward(self, activation: np.ndarray, target: np.ndarray) -> float:
-        self.pred = np.clip(softmax(activation), 1e-8, None)
         self.target = target
         batch_size = activation.shape[0]
-        return -np.sum(self.target * np.log(self.pred)) / batch_size
-    
+        if NUMBA_AVAILABLE and activation.ndim == 2:
+            # log-sum-exp fusion: the loss comes out of one streaming
+            # pass and pred is never materialized here; backward rebuilds
+            # it from the cached per-row (max, log_sum) stats
+            self.activation = np.ascontiguousarray(activation)
+            self._row_max = np.empty(batch_size, dtype=activation.dtype)
+            self._row_log_sum = np.empty(batch_size, dtype=activation.dtype)
+            self.pred = None
+            loss = _ce_with_logits(self.activation,
+                                   np.ascontiguousarray(target),
+                                   self._row_max, self._row_log_sum)
+            return loss / batch_size
+        # numpy fallback, same log-sum-exp identity as the kernel:
+        # log_softmax(x) = x - max - log(sum(exp(x - max))) is stable by
+        # construction, so no clip and no separate log over the (N, C)
+        # probabilities
+        row_max = np.max(activation, axis=1, keepdims=True)
+        log_sum = np.log(np.sum(np.exp(activation - row_max),
+                                axis=1, keepdims=True))
+        self.activation = activation
+        self._row_max = row_max[:, 0]
+        self._row_log_sum = log_sum[:, 0]
+        self.pred = None
+        return -np.sum(target * (activation - row_max - log_sum)) / batch_size
+
     def backward(self) -> np.ndarray:
-        batch_size = self.pred.shape[0]
+        batch_size = self.target.shape[0]
+        if self.pred is None:
+            # pred = softmax(x) = exp(x - max - log_sum)
+            self.pred = np.exp(self.activation
+                               - self._row_max[:, np.newaxis]
+                               - self._row_log_sum[:, np.newaxis])
         return (self.pred - self.target) / batch_size
 
 
@@ -699,12 +1101,23 @@ class Optimizer:
     def step(self):
         raise NotImplementedError
 
+@njit(parallel=True, fastmath=True, cache=True)
+def _adam_update(param, gradient, m, v,
+                 learning_rate, beta1, beta2, epsilon, bc1, bc2):
+    for i in prange(param.size):
+        g = gradient[i]
+        m[i] = beta1 * m[i] + (1.0 - beta1) * g
+        v[i] = beta2 * v[i] + (1.0 - beta2) * g * g
+        param[i] -= learning_rate * (m[i] / bc1) / (math.sqrt(v[i] / bc2) + epsilon)
+
+
 class AdamOptimizer(Optimizer):
     """
-    I store m and v values for each weight gradient and bias gradient
-    in dictionaries m and v where the key is the id of the parameter matrix
-    which has the form "dW{layer_id}" or "db{layer_id}". Thus, the parameter
-    matrix ids serve as gradient matrix ids.
+    I store m and v values for all parameters in two flat contiguous
+    buffers; each parameter owns a slice of them, addressed by the
+    position of the parameter in the (fixed) layer iteration order.
+    Integer positions replace the old "dW{layer_id}"/"db{layer_id}"
+    string keys, so a step does no string hashing per parameter.
     
     This solution works but I'm not sure that this approach could be used in a graph based computation. 
 
@@ -718,31 +1131,84 @@ class AdamOptimizer(Optimizer):
         self.beta1 = beta1
         self.beta2 = beta2
         self.epsilon = epsilon
-        self.m = {}
-        self.v = {}
         self.t = 0
+        # running powers of the betas: updated with one multiply per
+        # step instead of recomputing beta**t
+        self._b1_pow = 1.0
+        self._b2_pow = 1.0
+        # all first and second moments live in two big contiguous flat
+        # buffers, one slice per parameter. Compared to one array per
+        # parameter scattered over the heap this keeps the optimizer
+        # state streaming-friendly; params are used as the size source
+        # because they are garanteed to be initialized.
+        self._slices = []
+        total_size = 0
         for layer in self.trainable_layers:
-            for param, _, id in layer.get_parameters_and_gradients_and_ids():
-                # The params are used as shape source because they have 
-                # the same shape as the gradients and are garanteed 
-                # to be initialized.
-                self.m[id] = np.zeros_like(param)
-                self.v[id] = np.zeros_like(param)
-    
-    def update(self, gradient: np.ndarray, cache_id: str) -> None:
-        self.m[cache_id] = self.beta1 * self.m[cache_id] + (1 - self.beta1) * gradient
-        self.v[cache_id] = self.beta2 * self.v[cache_id] + (1 - self.beta2) * gradient ** 2
+            for param, _, _ in layer.get_parameters_and_gradients_and_ids():
+                self._slices.append((total_size, param.size))
+                total_size += param.size
+        self.m = np.zeros(total_size, dtype=DTYPE)
+        self.v = np.zeros(total_size, dtype=DTYPE)
+
+    def _moments(self, param_index: int) -> Tuple[np.ndarray, np.ndarray]:
+        offset, size = self._slices[param_index]
+        return self.m[offset:offset + size], self.v[offset:offset + size]
+
+    def update(self, gradient: np.ndarray, param_index: int) -> None:
+        m, v = self._moments(param_index)
+        gradient = gradient.reshape(-1)
+        m *= self.beta1
+        m += (1 - self.beta1) * gradient
+        v *= self.beta2
+        # gradient * gradient instead of ** 2: a plain multiply rather
+        # than np.power
+        v += (1 - self.beta2) * (gradient * gradient)
         
     def step(self) -> None:
         self.t += 1
+        # bias corrections are the same for every parameter at a given t
+        self._b1_pow *= self.beta1
+        self._b2_pow *= self.beta2
+        bc1 = 1 - self._b1_pow
+        bc2 = 1 - self._b2_pow
+        param_index = 0
         for layer in self.trainable_layers:
             #! Since np arrays are passed by reference the weights and bias
             # layer properties are going to be properly updated.
-            for parameter, gradient, cache_id in layer.get_parameters_and_gradients_and_ids():
-                self.update(gradient, cache_id)
-                m_corrected = self.m * (1 - self.beta1 ** self.t)
-                v_corrected = self.v * (1 - self.beta2 ** self.t)
-                parameter -= self.learning_rate * m_corrected / (np.sqrt(v_corrected) + self.epsilon)
+            for parameter, gradient, _ in layer.get_parameters_and_gradients_and_ids():
+                m, v = self._moments(param_index)
+                if NUMBA_AVAILABLE and parameter.flags['C_CONTIGUOUS']:
+                    # moment update, bias correction and parameter step
+                    # fused into one in-place pass: no temporaries, one
+                    # read/write of each tensor per step
+                    _adam_update(parameter.reshape(-1),
+                                 np.ascontiguousarray(gradient).reshape(-1),
+                                 m, v,
+                                 self.learning_rate, self.beta1, self.beta2,
+                                 self.epsilon, bc1, bc2)
+                else:
+                    self.update(gradient, param_index)
+                    m_corrected = m / bc1
+                    v_corrected = v / bc2
+                    parameter -= (self.learning_rate * m_corrected
+                                  / (np.sqrt(v_corrected) + self.epsilon)).reshape(parameter.shape)
+                param_index += 1
+
+
+@njit(parallel=True, fastmath=True, cache=True)
+def _sgd_update(param, gradient, learning_rate):
+    for i in prange(param.size):
+        param[i] -= learning_rate * gradient[i]
+
+
+# scipy is optional, like numba: its BLAS axpy (y += a*x, in place, no
+# temporary) covers the parameter update when numba is unavailable
+try:
+    from scipy.linalg.blas import saxpy as _saxpy, daxpy as _daxpy
+    _AXPY_BY_DTYPE = {np.dtype(np.float32): _saxpy,
+                      np.dtype(np.float64): _daxpy}
+except ImportError:
+    _AXPY_BY_DTYPE = {}
 
 
 class GradientDescentOptimizer(Optimizer):
@@ -755,7 +1221,26 @@ class GradientDescentOptimizer(Optimizer):
             #! Since np arrays are passed by reference the weights and bias
             # layer properties are going to be properly updated.
             for parameter, gradient, _ in layer.get_parameters_and_gradients_and_ids():
-                parameter -= self.learning_rate * gradient
+                if NUMBA_AVAILABLE and parameter.flags['C_CONTIGUOUS']:
+                    # in-place axpy, no lr*gradient temporary. The
+                    # gradient arrays are reallocated on every backward,
+                    # so a pointer list cached at init (true multi-tensor
+                    # apply) is not possible here; the remaining cost per
+                    # tensor is one jitted call
+                    _sgd_update(parameter.reshape(-1),
+                                np.ascontiguousarray(gradient).reshape(-1),
+                                self.learning_rate)
+                    continue
+                axpy = _AXPY_BY_DTYPE.get(parameter.dtype)
+                if (axpy is not None
+                        and parameter.flags['C_CONTIGUOUS']
+                        and gradient.dtype == parameter.dtype):
+                    # BLAS level-1 update on flat views, still no
+                    # lr*gradient temporary
+                    axpy(np.ascontiguousarray(gradient).reshape(-1),
+                         parameter.reshape(-1), a=-self.learning_rate)
+                else:
+                    parameter -= self.learning_rate * gradient
 
 
 class Sequential(Module):
@@ -773,16 +1258,52 @@ class Sequential(Module):
         for nn_module in self.nn_modules:
             self.trainable_layers.extend(nn_module.get_trainable_layers())
 
+        # bound methods resolved once: forward/backward then skip the
+        # per-call attribute lookup on every module of the stack
+        self._forwards = [nn_module.forward for nn_module in self.nn_modules]
+        self._backwards = [nn_module.backward
+                           for nn_module in reversed(self.nn_modules)]
+
     def forward(self, input_: np.ndarray) -> np.ndarray:
-        for nn_module in self.nn_modules:
-            input_ = nn_module.forward(input_)
+        for forward in self._forwards:
+            input_ = forward(input_)
         return input_
-    
+
     def backward(self, output_gradient: np.ndarray) -> np.ndarray:
-        for nn_module in reversed(self.nn_modules):
-            output_gradient = nn_module.backward(output_gradient)
+        for backward in self._backwards:
+            output_gradient = backward(output_gradient)
         return output_gradient
     
     def get_trainable_layers(self) -> List[TrainableLayer]:
         return self.trainable_layers
-    
\ No newline at end of file
+        
+
+def warmup_numba_kernels() -> None:
+    """
+    Compiles the hot element-wise kernels for their production
+    signatures so the first training iteration doesn't pay the JIT cost.
+    All kernels carry cache=True, so after the first run on a machine
+    this only loads the compiled code from numba's on-disk cache.
+    (AOT compilation via numba.pycc was considered instead, but pycc is
+    deprecated and does not support parallel=True, which would silence
+    the prange parallelism of these kernels.)
+    """
+    if not NUMBA_AVAILABLE:
+        return
+    f32 = np.zeros(2, dtype=np.float32)
+    f64 = np.zeros(2, dtype=np.float64)
+    rows32 = np.zeros((2, 2), dtype=np.float32)
+    _sigmoid_forward(f32, np.empty_like(f32))
+    # gradients arriving from a float64 loss keep a float64 signature
+    _sigmoid_backward(f32, f32, np.empty_like(f32))
+    _sigmoid_backward(f64, f32, np.empty_like(f64))
+    _softmax_rows(rows32, np.empty_like(rows32))
+    _softmax_backward(rows32, rows32, np.empty_like(rows32))
+    _ce_with_logits(rows32, rows32,
+                    np.empty(2, dtype=np.float32), np.empty(2, dtype=np.float32))
+    _adam_update(f32, f32, f32.copy(), f32.copy(),
+                 0.0, 0.9, 0.999, 1e-8, 1.0, 1.0)
+    _sgd_update(f32, f32, 0.0)
+
+
+warmup_numba_kernels()
@@ -72,12 +72,14 @@ class TestConv2d(TestLayer):
                                       sampler = sampler,
                                       bias = bias,
                                       my_conv2d_constructor = my_conv2d_constructor):
+                        # both implementations accumulate in float32 now,
+                        # so the comparison tolerance is float32-level
                         self._test_module(
                             my_conv2d,
                             torch_conv2d,
                             input_np = input_np,
                             dJ_dout = dJ_dout,
-                            atol=1e-6)
+                            atol=1e-5)
             
 
 if __name__ == "__main__":